@@ -11,23 +11,44 @@ BOING! IS LICENSED UNDER MIT.
 """
 Pong game using pygame-ce with:
 - main menu, settings, particle effects, delta-timing, impact effects
-- rebindable controls (persisted in config.pickle)
+- rebindable controls (persisted in config.json)
 - optional controller (gamepad/joystick) support
 - debug overlay (F3)
-- settings persisted to per-user config path via pickle
+- settings persisted to per-user config path as JSON
 
 This update: all menus and confirmation popups are mouse-clickable.
 You can now click menu entries, settings rows, remap controls rows and popup
 Yes/No buttons with the mouse as well as using keyboard/gamepad navigation.
 """
+import collections
+import functools
+import json
 import random
 import sys, os
 import math
+import textwrap
 import pickle
 import time
 import pygame as pg
 from pygame import mixer as mix
 
+# PyPy's JIT runs the plain-Python particle loops faster than NumPy's per-call
+# wrapping, so NumPy/numba are only imported on CPython. Both are optional there
+# too: without NumPy the game uses the same plain-Python particle path.
+IS_PYPY = hasattr(sys, "pypy_version_info")
+np = None
+numba = None
+if not IS_PYPY:
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    if np is not None:
+        try:
+            import numba  # optional: JIT-compiles the particle update
+        except ImportError:
+            numba = None
+
 
 def resource_path(relative_path):
     base_path = getattr(sys, '_MEIPASS', os.path.abspath("."))
@@ -70,6 +91,13 @@ BALL_SIZE = 14
 BALL_SPEED_START = 300.0  # px/s
 BALL_SPEED_INCREMENT = 0.8
 MAX_BALL_SPEED = 1200.0  # px/s cap
+HIT_SPEED_SCALE = 1.0 + BALL_SPEED_INCREMENT / 10.0  # per-hit speed-up below the cap
+
+# collision hot path compares squared speed and multiplies instead of dividing
+_MAX_SPEED_SQ = MAX_BALL_SPEED * MAX_BALL_SPEED
+_INV_BALL_SPEED_START = 1.0 / BALL_SPEED_START
+
+MAX_PARTICLES = 2048  # capacity of the particle buffers
 
 FONT_SIZE = 48
 MENU_FONT_SIZE = 64
@@ -82,6 +110,10 @@ ACCENT = (100, 200, 255)
 HIGHLIGHT = (200, 230, 255)
 PARTICLE_COLORS = [(255, 220, 120), (255, 120, 180), (120, 200, 255), (200, 255, 150)]
 
+# Paddle hit-flash gradient, WHITE -> ACCENT, indexed by remaining flash fraction
+FLASH_LUT_SIZE = 32
+FLASH_LUT = [tuple(int(WHITE[c] * (1 - f) + ACCENT[c] * f) for c in range(3)) for f in (i / (FLASH_LUT_SIZE - 1) for i in range(FLASH_LUT_SIZE))]
+
 # Default settings (modifiable in Settings menu)
 DEFAULT_SETTINGS = {
     "ai_difficulty": "Normal",     # Easy, Normal, Hard
@@ -99,21 +131,48 @@ DEFAULT_SETTINGS = {
     },
 }
 
+# Debug build: set BOING_DEBUG=1 in the environment. Read at import, so startup
+# checks (e.g. to_display_format) can see it; it also starts with the overlay on.
+DEBUG_BUILD = bool(os.getenv("BOING_DEBUG"))
+
 # Global debug toggle (F3)
-DEBUG = False
+DEBUG = DEBUG_BUILD
+DEBUG_REFRESH_SEC = 0.25  # how often the debug overlay re-renders its stats
+
+# True when the display presents with vsync; the game loop then lets flip() pace frames
+VSYNC = False
+# Clock.tick ceiling for the game loop. Under vsync it is twice the refresh rate:
+# far enough above the vblank interval that tick() never sleeps into a frame's
+# budget before flip(), but still a cap when present stops blocking (minimized
+# window, compositor ignoring vsync).
+FRAME_CAP = FPS
 
 # Global list of initialized joysticks (populated at runtime)
 JOYSTICKS = []  # list of pg.joystick.Joystick instances
+JOY_CAPS = []  # (joystick, num_axes, num_hats, num_buttons) per entry of JOYSTICKS
+JOYSTICKS_ENABLED = False  # set by init_joysticks(); False skips all joystick work in the game loop
+
+# Event types allowed onto the queue; everything else is blocked at the SDL level.
+# Paddle keys are polled directly, so KEYUP is never needed. run_game also passes
+# GAME_EVENTS to pg.event.get() so only those types are converted to Python events.
+MENU_EVENTS = [pg.QUIT, pg.KEYDOWN, pg.JOYBUTTONDOWN, pg.MOUSEBUTTONDOWN]
+GAME_EVENTS = [pg.QUIT, pg.KEYDOWN, pg.JOYBUTTONDOWN, pg.JOYAXISMOTION, pg.JOYHATMOTION, pg.MOUSEBUTTONDOWN]
 
 
 # Where to persist settings:
 def get_config_path():
     user_profile = os.getenv("USERPROFILE") or os.path.expanduser("~")
     config_dir = os.path.join(user_profile, "AppData", "pong", "config")
-    config_path = os.path.join(config_dir, "config.pickle")
+    config_path = os.path.join(config_dir, "config.json")
     return config_dir, config_path
 
 
+def get_legacy_config_path():
+    # earlier versions pickled the settings next to config.json
+    config_dir, _ = get_config_path()
+    return os.path.join(config_dir, "config.pickle")
+
+
 def ensure_config_dir():
     config_dir, _ = get_config_path()
     try:
@@ -125,12 +184,30 @@ def ensure_config_dir():
     return config_dir
 
 
+def migrate_legacy_settings():
+    """
+    Convert a pickled config from an earlier version to config.json, once.
+    """
+    _, config_path = get_config_path()
+    legacy_path = get_legacy_config_path()
+    if os.path.exists(config_path) or not os.path.exists(legacy_path):
+        return
+    try:
+        with open(legacy_path, "rb") as f:
+            data = pickle.load(f)
+        if isinstance(data, dict):
+            save_settings(data)
+    except Exception as e:
+        print(f"error migrating settings: {e}")
+
+
 def load_settings():
     _, config_path = get_config_path()
+    migrate_legacy_settings()
     try:
         if os.path.exists(config_path):
-            with open(config_path, "rb") as f:
-                data = pickle.load(f)
+            with open(config_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
             if isinstance(data, dict):
                 settings = DEFAULT_SETTINGS.copy()
                 # merge controls dict properly
@@ -153,10 +230,10 @@ def save_settings(settings):
     config_dir = ensure_config_dir()
     _, config_path = get_config_path()
     if not os.path.isdir(os.path.dirname(config_path)):
-        config_path = os.path.join(config_dir, "config.pickle")
+        config_path = os.path.join(config_dir, "config.json")
     try:
-        with open(config_path, "wb") as f:
-            pickle.dump(settings, f)
+        with open(config_path, "w", encoding="utf-8") as f:
+            json.dump(settings, f, indent=2)
     except Exception as e:
         print(f"error writing settings: {e}")
 
@@ -164,11 +241,12 @@ def save_settings(settings):
 # --- Joystick helpers ---
 def init_joysticks():
     """
-    Initialize available joysticks and populate JOYSTICKS list.
+    Initialize available joysticks and populate JOYSTICKS and JOY_CAPS lists.
     Call after pg.init().
     """
-    global JOYSTICKS
+    global JOYSTICKS, JOY_CAPS, JOYSTICKS_ENABLED
     JOYSTICKS = []
+    JOY_CAPS = []
     try:
         pg.joystick.init()
         count = pg.joystick.get_count()
@@ -182,20 +260,65 @@ def init_joysticks():
                 print(f"Initialization for a joystick FAILED! {e}")
     except Exception:
         JOYSTICKS = []
+    # axis/hat/button counts are fixed once a joystick is initialized
+    for joy in JOYSTICKS:
+        try:
+            JOY_CAPS.append((joy, joy.get_numaxes(), joy.get_numhats(), joy.get_numbuttons()))
+        except Exception:
+            JOY_CAPS.append((joy, 0, 0, 0))
+    JOYSTICKS_ENABLED = len(JOYSTICKS) > 0
 
 
 def joystick_info_summary():
     lines = []
-    for j in JOYSTICKS:
+    for j, n_axes, n_hats, n_buttons in JOY_CAPS:
         try:
-            lines.append(f"#{j.get_id()} {j.get_name()} axes={j.get_numaxes()} buttons={j.get_numbuttons()} hats={j.get_numhats()}")
+            lines.append(f"#{j.get_id()} {j.get_name()} axes={n_axes} buttons={n_buttons} hats={n_hats}")
         except Exception:
             lines.append("[joystick?]")
     return lines
 
 
+def read_joystick_state(deadzone):
+    """
+    Poll the stick/hat positions the game loop otherwise tracks from motion events.
+    Used to resync after the loop was away from the queue (match start, winner screen).
+    Returns (left_axis, right_axis, left_hat_y, right_hat_y).
+    """
+    def axis(index, axis_id):
+        if index >= len(JOY_CAPS) or axis_id >= JOY_CAPS[index][1]:
+            return 0.0
+        try:
+            v = JOY_CAPS[index][0].get_axis(axis_id)
+        except Exception:
+            return 0.0
+        return v if v > deadzone or v < -deadzone else 0.0
+
+    def hat_y(index):
+        if index >= len(JOY_CAPS) or JOY_CAPS[index][2] < 1:
+            return 0
+        try:
+            return JOY_CAPS[index][0].get_hat(0)[1]
+        except Exception:
+            return 0
+
+    # with a single controller its second stick (axis 3) drives the right paddle
+    right_axis = axis(0, 3) if len(JOY_CAPS) == 1 else axis(1, 1)
+    return axis(0, 1), right_axis, hat_y(0), hat_y(1)
+
+
+def set_event_filter(event_types):
+    """
+    Block every event type except event_types from entering the queue.
+    """
+    pg.event.set_blocked(None)
+    pg.event.set_allowed(event_types)
+
+
 # --- Classes ---
 class Paddle:
+    __slots__ = ("rect", "y", "speed", "flash_timer")
+
     def __init__(self, x, y):
         self.rect = pg.Rect(x, y, PADDLE_WIDTH, PADDLE_HEIGHT)
         self.y = float(self.rect.y)
@@ -212,83 +335,337 @@ class Paddle:
         if self.flash_timer > 0.0:
             self.flash_timer = max(0.0, self.flash_timer - dt)
 
+    def sprite(self):
+        return PADDLE_SPRITES[min(FLASH_LUT_SIZE - 1, int(self.flash_timer / 0.12 * (FLASH_LUT_SIZE - 1)))]
+
     def draw(self, surf):
-        if self.flash_timer > 0.0:
-            frac = self.flash_timer / 0.12
-            r = int(WHITE[0] * (1 - frac) + ACCENT[0] * frac)
-            g = int(WHITE[1] * (1 - frac) + ACCENT[1] * frac)
-            b = int(WHITE[2] * (1 - frac) + ACCENT[2] * frac)
-            color = (r, g, b)
-        else:
-            color = WHITE
-        pg.draw.rect(surf, color, self.rect, border_radius=6)
+        surf.blit(self.sprite(), self.rect)
 
 
 class Ball:
+    __slots__ = ("rect", "pos", "vel")
+
     def __init__(self):
         self.rect = pg.Rect(0, 0, BALL_SIZE, BALL_SIZE)
-        self.x = float(WIDTH // 2)
-        self.y = float(HEIGHT // 2)
-        self.vx = 0.0
-        self.vy = 0.0
+        self.pos = pg.math.Vector2(WIDTH // 2, HEIGHT // 2)
+        self.vel = pg.math.Vector2(0.0, 0.0)  # px/s
         self.reset(direction=1)
 
     def reset(self, direction=None):
-        self.x = float(WIDTH // 2)
-        self.y = float(HEIGHT // 2)
+        self.pos.update(WIDTH // 2, HEIGHT // 2)
         angle = random.uniform(-0.5, 0.5)
         speed = BALL_SPEED_START
         if direction is None:
             direction = random.choice([-1, 1])
-        self.vx = direction * speed * (1 + abs(angle))
-        self.vy = speed * angle * 2
-        self.rect.center = (int(self.x), int(self.y))
+        self.vel.update(direction * speed * (1 + abs(angle)), speed * angle * 2)
+        self.rect.center = (int(self.pos.x), int(self.pos.y))
 
     def update(self, dt):
-        self.x += self.vx * dt
-        self.y += self.vy * dt
+        pos = self.pos
+        pos += self.vel * dt
         half_h = self.rect.height / 2
-        if self.y - half_h <= 0:
-            self.y = half_h
-            self.vy = -self.vy
-        if self.y + half_h >= HEIGHT:
-            self.y = HEIGHT - half_h
-            self.vy = -self.vy
-        self.rect.centerx = int(self.x)
-        self.rect.centery = int(self.y)
+        if pos.y - half_h <= 0:
+            pos.y = half_h
+            self.vel.y = -self.vel.y
+        if pos.y + half_h >= HEIGHT:
+            pos.y = HEIGHT - half_h
+            self.vel.y = -self.vel.y
+        self.rect.center = (int(pos.x), int(pos.y))
 
     def draw(self, surf):
-        pg.draw.ellipse(surf, ACCENT, self.rect)
+        surf.blit(BALL_SPRITE, self.rect)
+
+
+def _step_and_compact(x, y, vx, vy, age, life, size, color_idx, n, dt):
+    """
+    Advance particles [0, n) by dt and compact survivors to the front in the same
+    pass. Returns the new live count. Works on lists (PyPy) and, once JIT-compiled
+    by numba, on the NumPy columns.
+    """
+    j = 0
+    for i in range(n):
+        a = age[i] + dt
+        if a >= life[i]:
+            continue
+        age[j] = a
+        x[j] = x[i] + vx[i] * dt
+        y[j] = y[i] + vy[i] * dt
+        vx[j] = vx[i] * (1.0 - 0.3 * dt)
+        vy[j] = (vy[i] + 60.0 * dt) * (1.0 - 0.1 * dt)
+        life[j] = life[i]
+        size[j] = size[i]
+        color_idx[j] = color_idx[i]
+        j += 1
+    return j
+
+
+# Optional numba build of the step for the NumPy columns. The explicit signature
+# compiles it (or loads it from numba's on-disk cache) at import rather than on
+# the first hit.
+_step_particles = None
+if numba is not None:
+    try:
+        _step_particles = numba.njit(
+            "int64(float32[:], float32[:], float32[:], float32[:], float32[:], float32[:], float32[:], int32[:], int64, float32)",
+            cache=True, fastmath=True,
+        )(_step_and_compact)
+    except Exception as e:
+        print(f"numba particle kernel unavailable, using NumPy: {e}")
+        _step_particles = None
 
 
-class Particle:
-    def __init__(self, pos, vel, life, size, color):
-        self.x, self.y = float(pos[0]), float(pos[1])
-        self.vx, self.vy = float(vel[0]), float(vel[1])
-        self.life = float(life)  # seconds
-        self.age = 0.0
-        self.size = float(size)
-        self.color = color
+class NumpyParticleSystem:
+    """
+    Particles stored as NumPy columns (structure of arrays).
+    Slots [0, n) are live; dead particles are compacted out after each update and
+    their slots reused by the next spawn, so the buffers double as the particle pool.
+    """
+    __slots__ = ("capacity", "n", "x", "y", "vx", "vy", "age", "life", "size", "color_idx",
+                 "_scratch", "_scratch_idx", "_alive")
+
+    def __init__(self, capacity=None):
+        self.capacity = capacity or MAX_PARTICLES
+        self.n = 0
+        self.x = np.empty(self.capacity, dtype=np.float32)
+        self.y = np.empty(self.capacity, dtype=np.float32)
+        self.vx = np.empty(self.capacity, dtype=np.float32)
+        self.vy = np.empty(self.capacity, dtype=np.float32)
+        self.age = np.empty(self.capacity, dtype=np.float32)
+        self.life = np.empty(self.capacity, dtype=np.float32)  # seconds
+        self.size = np.empty(self.capacity, dtype=np.float32)
+        self.color_idx = np.empty(self.capacity, dtype=np.int32)  # index into PARTICLE_COLORS
+        # preallocated work buffers reused every update instead of fresh temporaries
+        self._scratch = np.empty(self.capacity, dtype=np.float32)
+        self._scratch_idx = np.empty(self.capacity, dtype=np.int32)
+        self._alive = np.empty(self.capacity, dtype=bool)
+
+    def __len__(self):
+        return self.n
+
+    def spawn(self, pos, vx, vy, life, size, color_idx):
+        """
+        Append len(vx) particles at pos; extra particles are dropped once full.
+        """
+        k = min(len(vx), self.capacity - self.n)
+        if k <= 0:
+            return
+        s = slice(self.n, self.n + k)
+        self.x[s] = pos[0]
+        self.y[s] = pos[1]
+        self.vx[s] = vx[:k]
+        self.vy[s] = vy[:k]
+        self.age[s] = 0.0
+        self.life[s] = life[:k]
+        self.size[s] = size[:k]
+        self.color_idx[s] = color_idx[:k]
+        self.n += k
 
     def update(self, dt):
-        self.age += dt
-        self.x += self.vx * dt
-        self.y += self.vy * dt
-        self.vy += 60.0 * dt
-        self.vx *= (1.0 - 0.3 * dt)
-        self.vy *= (1.0 - 0.1 * dt)
+        n = self.n
+        if n == 0:
+            return
+        if _step_particles is not None:
+            self.n = _step_particles(self.x, self.y, self.vx, self.vy, self.age,
+                                     self.life, self.size, self.color_idx, n, dt)
+            return
 
-    def draw(self, surf):
-        if self.age >= self.life:
+        vx = self.vx[:n]
+        vy = self.vy[:n]
+        tmp = self._scratch[:n]
+        self.age[:n] += dt
+        np.multiply(vx, dt, out=tmp)
+        self.x[:n] += tmp
+        np.multiply(vy, dt, out=tmp)
+        self.y[:n] += tmp
+        vy += 60.0 * dt
+        vx *= (1.0 - 0.3 * dt)
+        vy *= (1.0 - 0.1 * dt)
+
+        alive = np.less(self.age[:n], self.life[:n], out=self._alive[:n])
+        m = int(np.count_nonzero(alive))
+        if m < n:
+            # compact survivors through the scratch buffers so culling allocates nothing
+            for col in (self.x, self.y, self.vx, self.vy, self.age, self.life, self.size):
+                np.compress(alive, col[:n], out=self._scratch[:m])
+                col[:m] = self._scratch[:m]
+            np.compress(alive, self.color_idx[:n], out=self._scratch_idx[:m])
+            self.color_idx[:m] = self._scratch_idx[:m]
+            self.n = m
+
+    def blits(self):
+        """
+        Returns (sprite, pos) blit tuples for every live particle.
+        """
+        n = self.n
+        if n == 0:
+            return []
+        top = PARTICLE_ALPHA_LEVELS - 1
+        radius = np.clip(self.size[:n].astype(np.int32), 1, PARTICLE_MAX_RADIUS)
+        frac = 1.0 - self.age[:n] / self.life[:n]
+        level = np.clip((frac * top + 0.5).astype(np.int32), 0, top)
+        ox = self.x[:n] - radius - 1
+        oy = self.y[:n] - radius - 1
+        return [
+            (PARTICLE_SPRITES[(ci, r)][a], (x, y))
+            for ci, r, a, x, y in zip(self.color_idx[:n].tolist(), radius.tolist(), level.tolist(), ox.tolist(), oy.tolist())
+        ]
+
+    def clear(self):
+        self.n = 0
+
+
+class PyParticleSystem:
+    """
+    Particles stored as plain-Python lists, used under PyPy or when NumPy is not installed.
+    Same interface as NumpyParticleSystem; the lists hold exactly the n live particles.
+    """
+    __slots__ = ("capacity", "n", "x", "y", "vx", "vy", "age", "life", "size", "color_idx")
+
+    def __init__(self, capacity=None):
+        self.capacity = capacity or MAX_PARTICLES
+        self.n = 0
+        self.x, self.y, self.vx, self.vy = [], [], [], []
+        self.age, self.life, self.size, self.color_idx = [], [], [], []
+
+    def __len__(self):
+        return self.n
+
+    def spawn(self, pos, vx, vy, life, size, color_idx):
+        """
+        Append len(vx) particles at pos; extra particles are dropped once full.
+        """
+        k = min(len(vx), self.capacity - self.n)
+        if k <= 0:
+            return
+        self.x.extend([pos[0]] * k)
+        self.y.extend([pos[1]] * k)
+        self.vx.extend(vx[:k])
+        self.vy.extend(vy[:k])
+        self.age.extend([0.0] * k)
+        self.life.extend(life[:k])
+        self.size.extend(size[:k])
+        self.color_idx.extend(color_idx[:k])
+        self.n += k
+
+    def update(self, dt):
+        n = self.n
+        if n == 0:
             return
-        alpha = max(0, int(255 * (1 - self.age / self.life)))
-        s = pg.Surface((int(self.size * 2 + 2), int(self.size * 2 + 2)), pg.SRCALPHA)
-        color = (*self.color, alpha)
-        pg.draw.circle(s, color, (int(self.size) + 1, int(self.size) + 1), max(1, int(self.size)))
-        surf.blit(s, (self.x - self.size - 1, self.y - self.size - 1))
+        m = _step_and_compact(self.x, self.y, self.vx, self.vy, self.age,
+                              self.life, self.size, self.color_idx, n, dt)
+        if m < n:
+            for col in (self.x, self.y, self.vx, self.vy, self.age, self.life, self.size, self.color_idx):
+                del col[m:]
+            self.n = m
+
+    def blits(self):
+        """
+        Returns (sprite, pos) blit tuples for every live particle.
+        """
+        top = PARTICLE_ALPHA_LEVELS - 1
+        out = []
+        for x, y, age, life, size, ci in zip(self.x, self.y, self.age, self.life, self.size, self.color_idx):
+            r = min(PARTICLE_MAX_RADIUS, max(1, int(size)))
+            level = min(top, max(0, int((1.0 - age / life) * top + 0.5)))
+            out.append((PARTICLE_SPRITES[(ci, r)][level], (x - r - 1, y - r - 1)))
+        return out
+
+    def clear(self):
+        self.n = 0
+        for col in (self.x, self.y, self.vx, self.vy, self.age, self.life, self.size, self.color_idx):
+            col.clear()
+
+
+ParticleSystem = PyParticleSystem if np is None else NumpyParticleSystem
+
+
+# --- Sprite caches ---
+# Pre-rendered particle circles, keyed by (color_idx, radius); each entry holds
+# PARTICLE_ALPHA_LEVELS surfaces from fully transparent to opaque.
+PARTICLE_ALPHA_LEVELS = 8
+PARTICLE_MAX_RADIUS = 9
+PARTICLE_SPRITES = {}
+
+# Static dashed center line, blitted at CENTER_LINE_POS each frame
+CENTER_LINE_SURF = None
+CENTER_LINE_POS = (WIDTH // 2 - 2, 0)
+
+BALL_SPRITE = None
+
+# Ball trail circles, one per fade bucket (size and alpha both shrink with age).
+# Per-bucket radius, alpha and top-left offset are tabulated so the draw loop only indexes.
+TRAIL_BUCKETS = 16
+TRAIL_FRAC = [(b + 0.5) / TRAIL_BUCKETS for b in range(TRAIL_BUCKETS)]
+TRAIL_SIZE_I = [int(6 * (0.4 + 0.6 * f)) for f in TRAIL_FRAC]
+TRAIL_ALPHA_I = [int(200 * f) for f in TRAIL_FRAC]
+TRAIL_HALF = [r + 1 for r in TRAIL_SIZE_I]  # sprite center relative to its top-left
+TRAIL_SPRITES = []
+
+# Paddle sprites, one per FLASH_LUT entry (index 0 is the resting WHITE paddle)
+PADDLE_SPRITES = []
+
+
+def to_display_format(surf):
+    """
+    Convert a per-pixel-alpha sprite to the display's pixel format so blits skip conversion.
+    """
+    surf = surf.convert_alpha()
+    # convert_alpha() is always 32-bit, so on 16/24-bit displays blits still convert;
+    # that only costs speed, so debug builds warn instead of refusing to start
+    if DEBUG_BUILD:
+        display_bits = pg.display.get_surface().get_bitsize()
+        if surf.get_bitsize() != display_bits:
+            print(f"sprite is {surf.get_bitsize()}-bit, display is {display_bits}-bit; blits will convert")
+    return surf
 
-    def is_dead(self):
-        return self.age >= self.life
+
+def init_sprites():
+    """
+    Pre-render sprite surfaces used by the game loop.
+    Call after pg.display.set_mode().
+    """
+    global CENTER_LINE_SURF, BALL_SPRITE
+    PADDLE_SPRITES.clear()
+    for color in FLASH_LUT:
+        spr = pg.Surface((PADDLE_WIDTH, PADDLE_HEIGHT), pg.SRCALPHA)
+        pg.draw.rect(spr, color, spr.get_rect(), border_radius=6)
+        PADDLE_SPRITES.append(to_display_format(spr))
+
+    BALL_SPRITE = pg.Surface((BALL_SIZE, BALL_SIZE), pg.SRCALPHA)
+    pg.draw.ellipse(BALL_SPRITE, ACCENT, BALL_SPRITE.get_rect())
+    BALL_SPRITE = to_display_format(BALL_SPRITE)
+
+    CENTER_LINE_SURF = pg.Surface((4, HEIGHT), pg.SRCALPHA)
+    for y in range(0, HEIGHT, 30):
+        pg.draw.rect(CENTER_LINE_SURF, DARK, (0, y + 5, 4, 20))
+    CENTER_LINE_SURF = to_display_format(CENTER_LINE_SURF)
+
+    TRAIL_SPRITES.clear()
+    for r, alpha, half in zip(TRAIL_SIZE_I, TRAIL_ALPHA_I, TRAIL_HALF):
+        s = pg.Surface((2 * half, 2 * half), pg.SRCALPHA)
+        pg.draw.circle(s, (*ACCENT, alpha), (half, half), r)
+        TRAIL_SPRITES.append(to_display_format(s))
+
+    PARTICLE_SPRITES.clear()
+    for ci, color in enumerate(PARTICLE_COLORS):
+        for r in range(1, PARTICLE_MAX_RADIUS + 1):
+            levels = []
+            for a in range(PARTICLE_ALPHA_LEVELS):
+                alpha = int(255 * a / (PARTICLE_ALPHA_LEVELS - 1))
+                s = pg.Surface((r * 2 + 2, r * 2 + 2), pg.SRCALPHA)
+                pg.draw.circle(s, (*color, alpha), (r + 1, r + 1), r)
+                levels.append(to_display_format(s))
+            PARTICLE_SPRITES[(ci, r)] = levels
+
+
+# Surface.fblits (pygame-ce 2.1.4+) skips building the returned rect list and
+# per-item flag parsing; older versions fall back to Surface.blits.
+if hasattr(pg.Surface, "fblits"):
+    def blit_batch(surf, blit_sequence):
+        surf.fblits(blit_sequence, 0)
+else:
+    def blit_batch(surf, blit_sequence):
+        surf.blits(blit_sequence, doreturn=False)
 
 
 # --- Helper functions ---
@@ -296,6 +673,12 @@ def clamp(n, a, b):
     return max(a, min(b, n))
 
 
+@functools.lru_cache(maxsize=256)
+def _render_cached(font, text, color):
+    # menu text rarely changes between frames; reuse the rendered surface
+    return font.render(text, True, color)
+
+
 def key_name(k):
     if k is None:
         return "<unbound>"
@@ -305,18 +688,18 @@ def key_name(k):
         return str(k)
 
 
-def ai_move(paddle: Paddle, ball: Ball, settings):
-    diff = settings.get("ai_difficulty", "Normal")
+def ai_params(diff):
+    """
+    Returns (maxspeed, deadzone) for an AI difficulty name.
+    """
     if diff == "Easy":
-        maxspeed = PADDLE_SPEED * 0.7
-        deadzone = 14.0
-    elif diff == "Hard":
-        maxspeed = PADDLE_SPEED * 1.35
-        deadzone = 4.0
-    else:
-        maxspeed = PADDLE_SPEED
-        deadzone = 8.0
+        return PADDLE_SPEED * 0.7, 14.0
+    if diff == "Hard":
+        return PADDLE_SPEED * 1.35, 4.0
+    return PADDLE_SPEED, 8.0
+
 
+def ai_move(paddle: Paddle, ball: Ball, maxspeed, deadzone):
     if paddle.rect.centery < ball.rect.centery - deadzone:
         paddle.speed = maxspeed
     elif paddle.rect.centery > ball.rect.centery + deadzone:
@@ -326,8 +709,7 @@ def ai_move(paddle: Paddle, ball: Ball, settings):
 
 
 def draw_center_line(surface):
-    for y in range(0, HEIGHT, 30):
-        pg.draw.rect(surface, DARK, (WIDTH // 2 - 2, y + 5, 4, 20))
+    surface.blit(CENTER_LINE_SURF, CENTER_LINE_POS)
 
 
 def get_particle_count(settings, base):
@@ -358,6 +740,15 @@ def colored_confirm_popup(screen, clock, small_font, message, title="Confirm", t
     yes_offset_x = w // 2 - 72
     no_offset_x = w // 2 + 72
 
+    # surfaces and text are constant for the lifetime of the popup; build them once
+    overlay = pg.Surface((w, h), pg.SRCALPHA)
+    dark = pg.Surface((WIDTH, HEIGHT), pg.SRCALPHA)
+    dark.fill((0, 0, 0, 140))
+    title_surf = small_font.render(title, True, DARK)
+
+    msg_lines = textwrap.wrap(message, width=60)
+    msg_surfs = [small_font.render(ln, True, WHITE) for ln in msg_lines]
+
     while True:
         dt = clock.tick(FPS)
         for ev in pg.event.get():
@@ -380,8 +771,8 @@ def colored_confirm_popup(screen, clock, small_font, message, title="Confirm", t
             if ev.type == pg.MOUSEBUTTONDOWN and ev.button == 1:
                 mx, my = ev.pos
                 # compute yes/no rects in screen coords
-                yes_surf = small_font.render(yes_text, True, WHITE)
-                no_surf = small_font.render(no_text, True, WHITE)
+                yes_surf = _render_cached(small_font, yes_text, WHITE)
+                no_surf = _render_cached(small_font, no_text, WHITE)
                 yes_rect = yes_surf.get_rect(center=(rect_x + yes_offset_x, rect_y + h - 40))
                 no_rect = no_surf.get_rect(center=(rect_x + no_offset_x, rect_y + h - 40))
                 if yes_rect.collidepoint(mx, my):
@@ -389,40 +780,22 @@ def colored_confirm_popup(screen, clock, small_font, message, title="Confirm", t
                 if no_rect.collidepoint(mx, my):
                     return False
 
-        overlay = pg.Surface((w, h), pg.SRCALPHA)
         overlay.fill((12, 12, 12, 230))
         pg.draw.rect(overlay, title_color, (0, 0, w, 36))
-        title_surf = small_font.render(title, True, DARK)
         overlay.blit(title_surf, (12, 6))
-
-        # wrap message
-        msg_lines = []
-        words = message.split(" ")
-        line = ""
-        for word in words:
-            if len(line) + len(word) + 1 > 60:
-                msg_lines.append(line)
-                line = word
-            else:
-                line = (line + " " + word).strip()
-        if line:
-            msg_lines.append(line)
-        for i, ln in enumerate(msg_lines):
-            msg_s = small_font.render(ln, True, WHITE)
+        for i, msg_s in enumerate(msg_surfs):
             overlay.blit(msg_s, (16, 48 + i * 20))
 
         yes_col = ACCENT if selected_yes else WHITE
         no_col = ACCENT if not selected_yes else WHITE
-        yes_surf = small_font.render(yes_text, True, yes_col)
-        no_surf = small_font.render(no_text, True, no_col)
+        yes_surf = _render_cached(small_font, yes_text, yes_col)
+        no_surf = _render_cached(small_font, no_text, no_col)
         # draw centered in overlay
         yes_rect = yes_surf.get_rect(center=(yes_offset_x, h - 40))
         no_rect = no_surf.get_rect(center=(no_offset_x, h - 40))
         overlay.blit(yes_surf, yes_rect.topleft)
         overlay.blit(no_surf, no_rect.topleft)
 
-        dark = pg.Surface((WIDTH, HEIGHT), pg.SRCALPHA)
-        dark.fill((0, 0, 0, 140))
         screen.blit(dark, (0, 0))
         screen.blit(overlay, (rect_x, rect_y))
         pg.display.flip()
@@ -484,14 +857,14 @@ def credits_menu(screen, clock, title_font, menu_font, small_font):
 
         screen.fill(BG)
         # title
-        title_surf = title_font.render("CREDITS", True, ACCENT)
+        title_surf = _render_cached(title_font, "CREDITS", ACCENT)
         screen.blit(title_surf, (WIDTH // 2 - title_surf.get_width() // 2, 36))
 
         y = 120
         for i, ln in enumerate(lines[1:]):
             # use menu_font for main lines and small_font for smaller lines
             font_to_use = menu_font if i < 6 else small_font
-            txt = font_to_use.render(ln, True, WHITE)
+            txt = _render_cached(font_to_use, ln, WHITE)
             screen.blit(txt, (WIDTH // 2 - txt.get_width() // 2, y))
             y += txt.get_height() + 6
 
@@ -543,7 +916,7 @@ def main_menu(screen, clock, title_font, menu_font, small_font, settings):
                             return None
 
         screen.fill(BG)
-        title_surf = title_font.render("BOING!", True, ACCENT)
+        title_surf = _render_cached(title_font, "BOING!", ACCENT)
         screen.blit(title_surf, (WIDTH // 2 - title_surf.get_width() // 2, 60))
 
         start_y = 200
@@ -551,14 +924,14 @@ def main_menu(screen, clock, title_font, menu_font, small_font, settings):
         mouse_rects.clear()
         for i, item in enumerate(menu_items):
             color = HIGHLIGHT if i == selected else WHITE
-            surf = menu_font.render(item, True, color)
+            surf = _render_cached(menu_font, item, color)
             x = WIDTH // 2 - surf.get_width() // 2
             y = start_y + i * gap
             rect = pg.Rect(x, y, surf.get_width(), surf.get_height())
             mouse_rects.append((rect, i))
             screen.blit(surf, (x, y))
 
-        help_surf = small_font.render("Use Up/Down and Enter to choose. Esc to quit.", True, DARK)
+        help_surf = _render_cached(small_font, "Use Up/Down and Enter to choose. Esc to quit.", DARK)
         screen.blit(help_surf, (WIDTH // 2 - help_surf.get_width() // 2, HEIGHT - 40))
 
         pg.display.flip()
@@ -671,7 +1044,7 @@ def settings_menu(screen, clock, title_font, menu_font, small_font, settings):
                             break
 
         screen.fill(BG)
-        title_surf = title_font.render("SETTINGS", True, ACCENT)
+        title_surf = _render_cached(title_font, "SETTINGS", ACCENT)
         screen.blit(title_surf, (WIDTH // 2 - title_surf.get_width() // 2, 40))
 
         start_y = 170
@@ -681,17 +1054,17 @@ def settings_menu(screen, clock, title_font, menu_font, small_font, settings):
             y = start_y + i * gap
             sel = (i == selected)
             color = HIGHLIGHT if sel else WHITE
-            label_surf = menu_font.render(label, True, color)
+            label_surf = _render_cached(menu_font, label, color)
             label_x = WIDTH // 2 - 260
             label_rect = pg.Rect(label_x, y, 520, label_surf.get_height())
             mouse_rows.append((label_rect, i))
             screen.blit(label_surf, (label_x, y))
             if vals:
                 cur = settings_get_label_value(settings, label)
-                val_surf = menu_font.render(cur, True, WHITE if not sel else ACCENT)
+                val_surf = _render_cached(menu_font, cur, WHITE if not sel else ACCENT)
                 screen.blit(val_surf, (WIDTH // 2 + 40, y))
 
-        hint = small_font.render("Use Left/Right to change values. Enter on Controls to rebind.", True, DARK)
+        hint = _render_cached(small_font, "Use Left/Right to change values. Enter on Controls to rebind.", DARK)
         screen.blit(hint, (WIDTH // 2 - hint.get_width() // 2, HEIGHT - 40))
 
         pg.display.flip()
@@ -831,7 +1204,7 @@ def controls_rebind_menu(screen, clock, title_font, menu_font, small_font, setti
                             break
 
         screen.fill(BG)
-        title_surf = title_font.render("REMAP CONTROLS", True, ACCENT)
+        title_surf = _render_cached(title_font, "REMAP CONTROLS", ACCENT)
         screen.blit(title_surf, (WIDTH // 2 - title_surf.get_width() // 2, 36))
 
         start_y = 140
@@ -841,7 +1214,7 @@ def controls_rebind_menu(screen, clock, title_font, menu_font, small_font, setti
             y = start_y + i * gap
             sel = (i == selected)
             color = HIGHLIGHT if sel else WHITE
-            label_surf = menu_font.render(label, True, color)
+            label_surf = _render_cached(menu_font, label, color)
             label_x = 120
             row_rect = pg.Rect(label_x, y, WIDTH - 240, label_surf.get_height())
             mouse_rows.append((row_rect, i))
@@ -852,14 +1225,14 @@ def controls_rebind_menu(screen, clock, title_font, menu_font, small_font, setti
             else:
                 bound = bindings.get(key)
                 val_text = "[UNBOUND]" if not bound else key_name(bound)
-            val_surf = menu_font.render(val_text, True, ACCENT if sel else WHITE)
+            val_surf = _render_cached(menu_font, val_text, ACCENT if sel else WHITE)
             screen.blit(val_surf, (WIDTH - val_surf.get_width() - 120, y))
 
-        hint = small_font.render("Enter to rebind | Backspace to clear | Click a row to rebind | Apply to commit | Esc to cancel", True, DARK)
+        hint = _render_cached(small_font, "Enter to rebind | Backspace to clear | Click a row to rebind | Apply to commit | Esc to cancel", DARK)
         screen.blit(hint, (WIDTH // 2 - hint.get_width() // 2, HEIGHT - 40))
 
         if awaiting_key and awaiting_action_key:
-            prompt = small_font.render(f"Press a key to bind for '{awaiting_action_key}' (Esc to cancel)", True, ACCENT)
+            prompt = _render_cached(small_font, f"Press a key to bind for '{awaiting_action_key}' (Esc to cancel)", ACCENT)
             screen.blit(prompt, (WIDTH // 2 - prompt.get_width() // 2, HEIGHT - 80))
 
         pg.display.flip()
@@ -891,7 +1264,7 @@ def show_winner_and_wait(screen, clock, font, left, right, ball, winner_text, wa
 
 # --- Main game ---
 def  run_game(screen, clock, font, small_font, mode, settings):
-    global DEBUG, JOYSTICKS
+    global DEBUG
 
     left = Paddle(20, HEIGHT // 2 - PADDLE_HEIGHT // 2)
     right = Paddle(WIDTH - 20 - PADDLE_WIDTH, HEIGHT // 2 - PADDLE_HEIGHT // 2)
@@ -902,8 +1275,22 @@ def  run_game(screen, clock, font, small_font, mode, settings):
     right_ai = True if mode == "1p" else False
     paused = False
 
-    particles = []
-    trail = []
+    particles = ParticleSystem()
+
+    # settings can't change mid-game; resolve the ones used per frame up front
+    ai_max, ai_deadzone = ai_params(settings.get("ai_difficulty", "Normal"))
+    sfx_on = bool(settings.get("sound", False))
+    keys = settings.get("controls", {})
+    k_lu = keys.get("left_up")
+    k_ld = keys.get("left_down")
+    k_ru = keys.get("right_up")
+    k_rd = keys.get("right_down")
+    # KEYDOWN action per key code, filled lowest priority first so that if keys are
+    # bound twice, reset > menu > debug > Esc still wins as with the old elif chain
+    key_actions = {pg.K_ESCAPE: "quit"}
+    for k, action in ((keys.get("debug"), "debug"), (keys.get("menu"), "menu"), (keys.get("reset"), "reset")):
+        if k:
+            key_actions[k] = action
 
     pq = settings.get("particle_quality", "Normal")
     if pq == "Low":
@@ -912,62 +1299,101 @@ def  run_game(screen, clock, font, small_font, mode, settings):
         TRAIL_LIFE_SEC = 0.45
     else:
         TRAIL_LIFE_SEC = 0.25
+    # (x, y, spawn time) per point; maxlen follows the loop's frame ceiling (FRAME_CAP,
+    # which tracks the refresh rate under vsync) with 2x headroom, so it never truncates
+    trail = collections.deque(maxlen=int(TRAIL_LIFE_SEC * FRAME_CAP * 2) + 4)
+    inv_trail_life = 1.0 / TRAIL_LIFE_SEC
 
-    frame_times = []
-    update_times = []
-    draw_times = []
     MAX_SAMPLES = 200
+    frame_times = collections.deque(maxlen=MAX_SAMPLES)
+    update_times = collections.deque(maxlen=MAX_SAMPLES)
+    draw_times = collections.deque(maxlen=MAX_SAMPLES)
 
     shake_timer = 0.0
     shake_magnitude = 0.0
 
     AXIS_DEADZONE = 0.20
 
+    # stick/hat positions, updated from JOYAXISMOTION/JOYHATMOTION events;
+    # seeded from the devices so a stick already held at match start counts
+    left_axis_value, right_axis_value, left_hat_y, right_hat_y = read_joystick_state(AXIS_DEADZONE)
+    # with a single controller its second stick (axis 3) drives the right paddle
+    single_stick = len(JOY_CAPS) == 1
+
+    # score digits and the help line can't change mid-match; render them once
+    # (scores past SCORE_TO_WIN only happen with the win condition disabled)
+    digit_surfs = {n: font.render(str(n), True, WHITE).convert_alpha() for n in range((SCORE_TO_WIN or 9) + 1)}
+    mode_text = "1P (vs AI)" if mode == "1p" else "2P (Local)"
+    help_surf = small_font.render(f"{mode_text}  |  Rebind Controls in Settings  |  R: reset  |  M: menu  |  F3: debug", True, DARK).convert_alpha()
+
+    paddle_half_h = left.rect.height / 2
+
+    # debug overlay: constant backdrop, cached text blits and joystick summary
+    dbg_w, dbg_h = 420, 180
+    dbg_surf = pg.Surface((dbg_w, dbg_h), pg.SRCALPHA)
+    dbg_surf.fill((8, 8, 8, 200))
+    dbg_blits = []
+    dbg_updated = float("-inf")
+    jinfo = joystick_info_summary()
+
+    # opaque off-screen play field, reused every frame and offset by screen shake
+    game_surf = pg.Surface((WIDTH, HEIGHT)).convert()
+
+    # names the loop hits every frame, bound to locals to skip global and attribute lookups
+    perf_counter = time.perf_counter
+    event_get = pg.event.get
+    get_pressed = pg.key.get_pressed
+    uniform = random.uniform
+    paddle_speed = PADDLE_SPEED
+    has_joy = JOYSTICKS_ENABLED
+    trail_sprites, trail_half = TRAIL_SPRITES, TRAIL_HALF
+    trail_buckets = TRAIL_BUCKETS
+    trail_last = TRAIL_BUCKETS - 1
+    ball_rect, left_rect, right_rect = ball.rect, left.rect, right.rect
+
+    def handle_hit(paddle, side):
+        """
+        Bounce the ball off paddle; side is 1 for the left paddle, -1 for the right.
+        """
+        nonlocal shake_timer, shake_magnitude
+        if sfx_on and HIT_SND:
+            try:
+                HIT_SND.play()
+            except Exception:
+                pass
+        if side == 1:
+            ball.pos.x = paddle.rect.right + ball_rect.width / 2.0
+            emit_x = ball_rect.left
+        else:
+            ball.pos.x = paddle.rect.left - ball_rect.width / 2.0
+            emit_x = ball_rect.right
+        ball.vel.x = side * abs(ball.vel.x)
+        offset = (ball_rect.centery - paddle.rect.centery) / paddle_half_h
+        ball.vel.y += offset * 150.0
+        sp2 = ball.vel.length_squared()
+        if sp2 < _MAX_SPEED_SQ:
+            ball.vel *= HIT_SPEED_SCALE
+        impact_strength = clamp(math.sqrt(sp2) * _INV_BALL_SPEED_START, 0.8, 3.0)
+        emit_particles(particles, (emit_x, ball_rect.centery), direction=side, settings=settings, intensity=impact_strength)
+        paddle.flash_timer = 0.12
+        shake_timer = max(shake_timer, 0.12)
+        shake_magnitude = max(shake_magnitude, min(18.0, 6.0 * impact_strength))
+
     running = True
-    if MENU_MUSIC and settings.get("sound", False):
+    last_frame = perf_counter()
+    if MENU_MUSIC and sfx_on:
         try:
             MENU_MUSIC.stop()
         except Exception:
             pass
     while running:
-        dt = clock.tick(FPS) / 1000.0
-        frame_start = time.perf_counter()
-
-        if JOYSTICKS:
-            try:
-                j0 = JOYSTICKS[0]
-                if j0.get_numaxes() > 1:
-                    v = j0.get_axis(1)
-                    left_axis_value = 0.0 if abs(v) < AXIS_DEADZONE else v
-                    left.speed = left_axis_value * PADDLE_SPEED
-                if j0.get_numhats() > 0:
-                    hat_y = j0.get_hat(0)[1]
-                    if hat_y != 0:
-                        left.speed = -hat_y * PADDLE_SPEED
-            except Exception:
-                pass
+        # with vsync, flip() normally paces frames and FRAME_CAP is only a safety ceiling
+        clock.tick(FRAME_CAP)
+        frame_start = perf_counter()
+        dt = frame_start - last_frame
+        last_frame = frame_start
 
-            try:
-                if len(JOYSTICKS) >= 2:
-                    j1 = JOYSTICKS[1]
-                    if j1.get_numaxes() > 1:
-                        v = j1.get_axis(1)
-                        right_axis_value = 0.0 if abs(v) < AXIS_DEADZONE else v
-                        right.speed = right_axis_value * PADDLE_SPEED
-                    if j1.get_numhats() > 0:
-                        hat_y = j1.get_hat(0)[1]
-                        if hat_y != 0:
-                            right.speed = -hat_y * PADDLE_SPEED
-                else:
-                    j0 = JOYSTICKS[0]
-                    if j0.get_numaxes() > 3:
-                        v = j0.get_axis(3)
-                        right_axis_value = 0.0 if abs(v) < AXIS_DEADZONE else v
-                        right.speed = right_axis_value * PADDLE_SPEED
-            except Exception:
-                pass
-
-        for event in pg.event.get():
+        for event in event_get(GAME_EVENTS):
             if event.type == pg.QUIT:
                 return None
 
@@ -984,51 +1410,65 @@ def  run_game(screen, clock, font, small_font, mode, settings):
                     DEBUG = not DEBUG
                 continue
 
+            if event.type == pg.JOYAXISMOTION:
+                v = event.value
+                v = v if v > AXIS_DEADZONE or v < -AXIS_DEADZONE else 0.0
+                jid = getattr(event, "joy", None)
+                if jid == 0 and event.axis == 1:
+                    left_axis_value = v
+                elif (jid == 1 and event.axis == 1) or (jid == 0 and event.axis == 3 and single_stick):
+                    right_axis_value = v
+                continue
+
             if event.type == pg.JOYHATMOTION:
                 hat_x, hat_y = event.value
                 jid = getattr(event, "joy", None)
                 if jid == 0:
-                    left.speed = -hat_y * PADDLE_SPEED
+                    left_hat_y = hat_y
                 elif jid == 1:
-                    right.speed = -hat_y * PADDLE_SPEED
+                    right_hat_y = hat_y
                 continue
 
             if event.type == pg.KEYDOWN:
-                controls = settings.get("controls", {})
-                if event.key == controls.get("left_up"):
-                    left.speed = -PADDLE_SPEED
-                elif event.key == controls.get("left_down"):
-                    left.speed = PADDLE_SPEED
-                elif event.key == controls.get("right_up") and not right_ai:
-                    right.speed = -PADDLE_SPEED
-                elif event.key == controls.get("right_down") and not right_ai:
-                    right.speed = PADDLE_SPEED
-                elif event.key == controls.get("reset"):
+                action = key_actions.get(event.key)
+                if action == "reset":
                     score_left = 0
                     score_right = 0
                     ball.reset()
                     trail.clear()
-                elif event.key == controls.get("menu"):
+                elif action == "menu":
                     return "menu"
-                elif event.key == controls.get("debug"):
+                elif action == "debug":
                     DEBUG = not DEBUG
-                elif event.key == pg.K_ESCAPE:
+                elif action == "quit":
                     return None
-            elif event.type == pg.KEYUP:
-                controls = settings.get("controls", {})
-                if event.key == controls.get("left_up") and left.speed < 0:
-                    left.speed = 0.0
-                if event.key == controls.get("left_down") and left.speed > 0:
-                    left.speed = 0.0
-                if event.key == controls.get("right_up") and right.speed < 0:
-                    right.speed = 0.0
-                if event.key == controls.get("right_down") and right.speed > 0:
-                    right.speed = 0.0
-
-        t0 = time.perf_counter()
+
+        if has_joy:
+            # a held hat overrides the stick
+            left.speed = (-left_hat_y if left_hat_y else left_axis_value) * paddle_speed
+            if not right_ai:
+                right.speed = (-right_hat_y if right_hat_y else right_axis_value) * paddle_speed
+
+        # paddle movement keys are polled; with a joystick attached it keeps control when no key is held
+        pressed = get_pressed()
+        if k_lu and pressed[k_lu]:
+            left.speed = -paddle_speed
+        elif k_ld and pressed[k_ld]:
+            left.speed = paddle_speed
+        elif not has_joy:
+            left.speed = 0.0
+        if not right_ai:
+            if k_ru and pressed[k_ru]:
+                right.speed = -paddle_speed
+            elif k_rd and pressed[k_rd]:
+                right.speed = paddle_speed
+            elif not has_joy:
+                right.speed = 0.0
+
+        t0 = perf_counter()
 
         if right_ai:
-            ai_move(right, ball, settings)
+            ai_move(right, ball, ai_max, ai_deadzone)
 
         left.move(dt)
         right.move(dt)
@@ -1036,55 +1476,19 @@ def  run_game(screen, clock, font, small_font, mode, settings):
         if not paused:
             ball.update(dt)
 
-        trail.insert(0, (ball.x, ball.y, 0.0))
-        new_trail = []
-        for x, y, age in trail:
-            age += dt
-            if age < TRAIL_LIFE_SEC:
-                new_trail.append((x, y, age))
-        trail = new_trail[:int(TRAIL_LIFE_SEC / max(dt, 1e-6) + 1)]
+        # newest point at the left; points expire from the right once older than TRAIL_LIFE_SEC
+        trail.appendleft((ball.pos.x, ball.pos.y, frame_start))
+        while frame_start - trail[-1][2] >= TRAIL_LIFE_SEC:
+            trail.pop()
 
-        if ball.rect.colliderect(left.rect):
-            if settings.get("sound", False) and HIT_SND:
-                try:
-                    HIT_SND.play()
-                except Exception:
-                    pass
-            ball.x = left.rect.right + ball.rect.width / 2.0
-            ball.vx = abs(ball.vx)
-            offset = (ball.rect.centery - left.rect.centery) / (left.rect.height / 2)
-            ball.vy += offset * 150.0
-            speed = math.hypot(ball.vx, ball.vy)
-            if speed < MAX_BALL_SPEED:
-                scale = 1.0 + BALL_SPEED_INCREMENT / 10.0
-                ball.vx *= scale
-                ball.vy *= scale
-            impact_strength = clamp(speed / BALL_SPEED_START, 0.8, 3.0)
-            emit_particles(particles, (ball.rect.left, ball.rect.centery), direction=1, settings=settings, intensity=impact_strength)
-            left.flash_timer = 0.12
-            shake_timer = max(shake_timer, 0.12)
-            shake_magnitude = max(shake_magnitude, min(18.0, 6.0 * impact_strength))
-
-        if ball.rect.colliderect(right.rect):
-            if settings.get("sound", False) and HIT_SND:
-                try:
-                    HIT_SND.play()
-                except Exception:
-                    pass
-            ball.x = right.rect.left - ball.rect.width / 2.0
-            ball.vx = -abs(ball.vx)
-            offset = (ball.rect.centery - right.rect.centery) / (right.rect.height / 2)
-            ball.vy += offset * 150.0
-            speed = math.hypot(ball.vx, ball.vy)
-            if speed < MAX_BALL_SPEED:
-                scale = 1.0 + BALL_SPEED_INCREMENT / 10.0
-                ball.vx *= scale
-                ball.vy *= scale
-            impact_strength = clamp(speed / BALL_SPEED_START, 0.8, 3.0)
-            emit_particles(particles, (ball.rect.right, ball.rect.centery), direction=-1, settings=settings, intensity=impact_strength)
-            right.flash_timer = 0.12
-            shake_timer = max(shake_timer, 0.12)
-            shake_magnitude = max(shake_magnitude, min(18.0, 6.0 * impact_strength))
+        # same overlap test as colliderect, inlined; the X test fails on most frames
+        if (ball_rect.left < left_rect.right and ball_rect.right > left_rect.left
+                and ball_rect.top < left_rect.bottom and ball_rect.bottom > left_rect.top):
+            handle_hit(left, 1)
+
+        if (ball_rect.right > right_rect.left and ball_rect.left < right_rect.right
+                and ball_rect.top < right_rect.bottom and ball_rect.bottom > right_rect.top):
+            handle_hit(right, -1)
 
         scorer = None
         if ball.rect.right < 0:
@@ -1095,7 +1499,7 @@ def  run_game(screen, clock, font, small_font, mode, settings):
             scorer = -1
 
         if scorer is not None:
-            if settings.get("sound", False) and SCORE_SND:
+            if sfx_on and SCORE_SND:
                 try:
                     SCORE_SND.play()
                 except Exception:
@@ -1114,149 +1518,197 @@ def  run_game(screen, clock, font, small_font, mode, settings):
                     quit_requested = show_winner_and_wait(screen, clock, font, left, right, ball, winner_text, wait_ms=1800)
                     if quit_requested:
                         return None
+                    # don't fold the winner screen's wait into the next frame's dt
+                    last_frame = perf_counter()
+                    # the winner screen drained any motion events; resync the sticks
+                    left_axis_value, right_axis_value, left_hat_y, right_hat_y = read_joystick_state(AXIS_DEADZONE)
                     score_left = 0
                     score_right = 0
                     ball.reset()
                     trail.clear()
                     paused = False
 
-        t1 = time.perf_counter()
+        t1 = perf_counter()
         update_duration = (t1 - t0) * 1000.0
 
-        for p in particles:
-            p.update(dt)
-        particles = [p for p in particles if not p.is_dead()]
+        particles.update(dt)
 
         if shake_timer > 0.0:
             shake_timer = max(0.0, shake_timer - dt)
             if shake_timer <= 0.0:
                 shake_magnitude = 0.0
 
-        t_draw_start = time.perf_counter()
+        t_draw_start = perf_counter()
 
-        game_surf = pg.Surface((WIDTH, HEIGHT), pg.SRCALPHA)
         game_surf.fill(BG)
-        draw_center_line(game_surf)
-
-        for x, y, age in reversed(trail):
-            frac = 1.0 - (age / max(1e-6, TRAIL_LIFE_SEC))
-            size = 6 * (0.4 + 0.6 * frac)
-            alpha = int(200 * frac)
-            s = pg.Surface((int(size * 2 + 2), int(size * 2 + 2)), pg.SRCALPHA)
-            pg.draw.circle(s, (ACCENT[0], ACCENT[1], ACCENT[2], alpha),
-                           (int(size) + 1, int(size) + 1), int(size))
-            game_surf.blit(s, (x - size - 1, y - size - 1))
-
-        left.draw(game_surf)
-        right.draw(game_surf)
-        ball.draw(game_surf)
-
-        for p in particles:
-            p.draw(game_surf)
-
-        left_surf = font.render(str(score_left), True, WHITE)
-        right_surf = font.render(str(score_right), True, WHITE)
-        game_surf.blit(left_surf, (WIDTH // 4 - left_surf.get_width() // 2, 20))
-        game_surf.blit(right_surf, (WIDTH * 3 // 4 - right_surf.get_width() // 2, 20))
+        # play field and scores are submitted back to front as a single batch
+        frame_blits = [(CENTER_LINE_SURF, CENTER_LINE_POS)]
+        for x, y, spawn_t in reversed(trail):
+            b = min(trail_last, int((1.0 - (frame_start - spawn_t) * inv_trail_life) * trail_buckets))
+            half = trail_half[b]
+            frame_blits.append((trail_sprites[b], (x - half, y - half)))
+        frame_blits.append((left.sprite(), left.rect))
+        frame_blits.append((right.sprite(), right.rect))
+        frame_blits.append((BALL_SPRITE, ball.rect))
+        frame_blits.extend(particles.blits())
+
+        left_surf = digit_surfs[score_left] if score_left in digit_surfs else _render_cached(font, str(score_left), WHITE)
+        right_surf = digit_surfs[score_right] if score_right in digit_surfs else _render_cached(font, str(score_right), WHITE)
+        frame_blits.append((left_surf, (WIDTH // 4 - left_surf.get_width() // 2, 20)))
+        frame_blits.append((right_surf, (WIDTH * 3 // 4 - right_surf.get_width() // 2, 20)))
+        blit_batch(game_surf, frame_blits)
 
         if shake_timer > 0.0 and shake_magnitude > 0.0:
             mag = shake_magnitude * (shake_timer / 0.12 if shake_timer < 0.12 else 1.0)
-            ox = int(random.uniform(-mag, mag))
-            oy = int(random.uniform(-mag, mag))
+            ox = int(uniform(-mag, mag))
+            oy = int(uniform(-mag, mag))
         else:
             ox = 0
             oy = 0
 
-        screen.fill(BG)
-        screen.blit(game_surf, (ox, oy))
-
-        mode_text = "1P (vs AI)" if mode == "1p" else "2P (Local)"
-        help_surf = small_font.render(f"{mode_text}  |  Rebind Controls in Settings  |  R: reset  |  M: menu  |  F3: debug", True, DARK)
-        screen.blit(help_surf, (20, HEIGHT - 28))
-
-        t_draw_end = time.perf_counter()
+        # game_surf is opaque, so only the strips uncovered by the shake offset need clearing
+        if ox > 0:
+            screen.fill(BG, (0, 0, ox, HEIGHT))
+        elif ox < 0:
+            screen.fill(BG, (WIDTH + ox, 0, -ox, HEIGHT))
+        if oy > 0:
+            screen.fill(BG, (0, 0, WIDTH, oy))
+        elif oy < 0:
+            screen.fill(BG, (0, HEIGHT + oy, WIDTH, -oy))
+
+        # play field, help line and debug overlay go to the screen in one batch
+        screen_blits = [(game_surf, (ox, oy)), (help_surf, (20, HEIGHT - 28))]
+        if DEBUG:
+            # stats text is re-rendered a few times per second, not every frame
+            if frame_start - dbg_updated >= DEBUG_REFRESH_SEC:
+                dbg_updated = frame_start
+                fps = clock.get_fps()
+                avg_frame = sum(frame_times) / max(1, len(frame_times))
+                avg_update = sum(update_times) / max(1, len(update_times))
+                avg_draw = sum(draw_times) / max(1, len(draw_times))
+                stats = [
+                    f"FPS: {fps:.1f}",
+                    f"Frame: {avg_frame:.2f} ms",
+                    f"Update: {avg_update:.2f} ms",
+                    f"Draw: {avg_draw:.2f} ms",
+                    f"Particles: {len(particles)}",
+                    f"TrailLen: {len(trail)}",
+                    f"Shake: {shake_magnitude:.1f}px / {shake_timer:.2f}s",
+                ]
+                dbg_blits = [(dbg_surf, (WIDTH - dbg_w - 12, 12))]
+                for i, line in enumerate(stats):
+                    txt = small_font.render(line, True, ACCENT if i == 0 else WHITE)
+                    dbg_blits.append((txt, (WIDTH - dbg_w + 8, 16 + i * 18)))
+
+                y0 = 16 + len(stats) * 18 + 6
+                for i, jline in enumerate(jinfo):
+                    txt = _render_cached(small_font, jline, WHITE)
+                    dbg_blits.append((txt, (WIDTH - dbg_w + 8, y0 + i * 16)))
+            screen_blits += dbg_blits
+        blit_batch(screen, screen_blits)
+
+        t_draw_end = perf_counter()
         draw_duration = (t_draw_end - t_draw_start) * 1000.0
 
-        frame_duration = (time.perf_counter() - frame_start) * 1000.0
+        frame_duration = (perf_counter() - frame_start) * 1000.0
         frame_times.append(frame_duration)
         update_times.append(update_duration)
         draw_times.append(draw_duration)
-        if len(frame_times) > MAX_SAMPLES:
-            frame_times.pop(0)
-            update_times.pop(0)
-            draw_times.pop(0)
-
-        if DEBUG:
-            dbg_w, dbg_h = 420, 180
-            dbg_surf = pg.Surface((dbg_w, dbg_h), pg.SRCALPHA)
-            dbg_surf.fill((8, 8, 8, 200))
-            screen.blit(dbg_surf, (WIDTH - dbg_w - 12, 12))
-
-            fps = clock.get_fps()
-            avg_frame = sum(frame_times) / max(1, len(frame_times))
-            avg_update = sum(update_times) / max(1, len(update_times))
-            avg_draw = sum(draw_times) / max(1, len(draw_times))
-            stats = [
-                f"FPS: {fps:.1f}",
-                f"Frame: {avg_frame:.2f} ms",
-                f"Update: {avg_update:.2f} ms",
-                f"Draw: {avg_draw:.2f} ms",
-                f"Particles: {len(particles)}",
-                f"TrailLen: {len(trail)}",
-                f"Shake: {shake_magnitude:.1f}px / {shake_timer:.2f}s",
-            ]
-            for i, line in enumerate(stats):
-                txt = small_font.render(line, True, ACCENT if i == 0 else WHITE)
-                screen.blit(txt, (WIDTH - dbg_w + 8, 16 + i * 18))
-
-            y0 = 16 + len(stats) * 18 + 6
-            jinfo = joystick_info_summary()
-            for i, jline in enumerate(jinfo):
-                txt = small_font.render(jline, True, WHITE)
-                screen.blit(txt, (WIDTH - dbg_w + 8, y0 + i * 16))
 
+        # No dirty-rect update here: game_surf covers the whole window every frame,
+        # and with pg.SCALED the renderer presents the full texture either way.
         pg.display.flip()
 
     return None
 
 
 # --- Particle emission helpers ---
-def emit_particles(particles_list, pos, direction, settings, intensity=1.0):
+# _random_burst(count, angle, speed, jitter, life, size) draws a burst's per-particle
+# fields; each range is a (low, high) pair and jitter, if given, scales speed.
+# Returns (vx, vy, life, size, color_idx) in the columns' native form.
+if np is None:
+    def _random_burst(count, angle, speed, jitter, life, size):
+        uniform = random.uniform
+        last_color = len(PARTICLE_COLORS) - 1
+        vx, vy, lives, sizes, colors = [], [], [], [], []
+        for _ in range(count):
+            a = uniform(*angle)
+            s = uniform(*speed)
+            if jitter is not None:
+                s *= uniform(*jitter)
+            vx.append(math.cos(a) * s)
+            vy.append(math.sin(a) * s)
+            lives.append(uniform(*life))
+            sizes.append(uniform(*size))
+            colors.append(random.randint(0, last_color))
+        return vx, vy, lives, sizes, colors
+else:
+    # one Generator for all bursts; draws are float32 so spawn() copies without casting
+    _RNG = np.random.default_rng()
+
+    def _uniform(low, high, count):
+        return low + (high - low) * _RNG.random(count, dtype=np.float32)
+
+    def _random_burst(count, angle, speed, jitter, life, size):
+        a = _uniform(*angle, count)
+        s = _uniform(*speed, count)
+        if jitter is not None:
+            s *= _uniform(*jitter, count)
+        color_idx = _RNG.integers(0, len(PARTICLE_COLORS), count, dtype=np.int32)
+        return np.cos(a) * s, np.sin(a) * s, _uniform(*life, count), _uniform(*size, count), color_idx
+
+
+def emit_particles(particles, pos, direction, settings, intensity=1.0):
     base = 12
     count = int(get_particle_count(settings, base) * intensity)
     count = max(2, min(200, count))
-    for _ in range(count):
-        speed = random.uniform(80.0, 360.0) * (0.7 + random.random() * 0.8) * intensity
-        angle = random.uniform(-0.9, 0.9) + (0 if direction == 1 else math.pi)
-        vx = math.cos(angle) * speed
-        vy = math.sin(angle) * speed
-        life = random.uniform(0.18, 0.7)
-        size = random.uniform(2.0, 6.0) * (0.6 + 0.8 * min(1.0, intensity))
-        color = random.choice(PARTICLE_COLORS)
-        particles_list.append(Particle(pos, (vx, vy), life, size, color))
-
-
-def emit_score_burst(particles_list, pos, settings):
+    heading = 0.0 if direction == 1 else math.pi
+    size_scale = 0.6 + 0.8 * min(1.0, intensity)
+    particles.spawn(pos, *_random_burst(
+        count,
+        angle=(heading - 0.9, heading + 0.9),
+        speed=(80.0 * intensity, 360.0 * intensity),
+        jitter=(0.7, 1.5),
+        life=(0.18, 0.7),
+        size=(2.0 * size_scale, 6.0 * size_scale),
+    ))
+
+
+def emit_score_burst(particles, pos, settings):
     base = 48
     count = get_particle_count(settings, base)
-    for _ in range(count):
-        speed = random.uniform(120.0, 420.0)
-        angle = random.uniform(0, math.tau)
-        vx = math.cos(angle) * speed
-        vy = math.sin(angle) * speed
-        life = random.uniform(0.5, 1.1)
-        size = random.uniform(3.0, 6.0)
-        color = random.choice(PARTICLE_COLORS)
-        particles_list.append(Particle(pos, (vx, vy), life, size, color))
+    particles.spawn(pos, *_random_burst(
+        count,
+        angle=(0.0, math.tau),
+        speed=(120.0, 420.0),
+        jitter=None,
+        life=(0.5, 1.1),
+        size=(3.0, 6.0),
+    ))
 
 
 # --- Entry point ---
 def main():
     pg.init()
+    set_event_filter(MENU_EVENTS)
     init_joysticks()
 
+    global VSYNC, FRAME_CAP
     pg.display.set_caption("BOING! V1.0")
-    screen = pg.display.set_mode((WIDTH, HEIGHT))
+    try:
+        screen = pg.display.set_mode((WIDTH, HEIGHT), pg.SCALED | pg.DOUBLEBUF, vsync=1)
+        # is_vsync() is pygame-ce 2.2+; without it assume no vsync and pace by Clock.tick
+        is_vsync = getattr(pg.display, "is_vsync", None)
+        VSYNC = bool(is_vsync()) if is_vsync else False
+    except pg.error:
+        # no vsync-capable renderer; fall back to a plain window paced by Clock.tick
+        screen = pg.display.set_mode((WIDTH, HEIGHT))
+        VSYNC = False
+    if VSYNC:
+        get_refresh_rate = getattr(pg.display, "get_current_refresh_rate", None)
+        refresh = get_refresh_rate() if get_refresh_rate else 0
+        FRAME_CAP = 2 * max(FPS, refresh)
+    init_sprites()
     clock = pg.time.Clock()
 
     global title_font, font, small_font
@@ -1288,7 +1740,9 @@ def main():
                 break
             settings = new_settings
             continue
+        set_event_filter(GAME_EVENTS)
         result = run_game(screen, clock, font, small_font, mode, settings)
+        set_event_filter(MENU_EVENTS)
         if result is None:
             break
 